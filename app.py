@@ -1,13 +1,25 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import requests
+import aiohttp
+import asyncio
+import orjson
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from disk_cache import read_disk_cache, write_disk_cache
 
 # --- Configuration --- #
 NEWS_API_KEY = "YOUR_NEWS_API_KEY"  # Replace with your actual NewsAPI key
 
+# Disk cache TTLs; see disk_cache.py
+PRICE_CACHE_TTL = 3600  # seconds, daily bars only change once per trading day
+NEWS_CACHE_TTL = 900
+
 RISK_PROFILES = {
     "Conservative": {
         "description": "Focus on capital preservation with lower risk and steady returns.",
@@ -29,55 +41,192 @@ RISK_PROFILES = {
     },
 }
 
+INVESTMENT_HORIZONS = (1, 3, 5, 10, 15, 20)
+
+# Growth factors for every (expected return, horizon) pair the sidebar can produce
+PROJECTION_FACTORS = {
+    (profile['expected_return'], horizon): np.power(1.0 + profile['expected_return'], np.arange(1, horizon + 1))
+    for profile in RISK_PROFILES.values()
+    for horizon in INVESTMENT_HORIZONS
+}
+
+# Shared styling for every Plotly chart on the page
+COMMON_LAYOUT = dict(
+    title_font_size=16,
+    title_font_color='#2c3e50',
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    xaxis=dict(gridcolor='#e1e5e9'),
+    yaxis=dict(gridcolor='#e1e5e9')
+)
+
 # --- Helper Functions --- #
-def calculate_projected_value(principal, annual_return, years):
-    return principal * (1 + annual_return)**years
+def summarize_history(hist):
+    if hist.empty:
+        return None
+    close = np.asarray(hist["Close"].values, dtype=np.float64)
+    current_price, previous_close, one_year_ago_price = close[[-1, -2, 0]]
+    daily_change_abs = current_price - previous_close
+    daily_change_pct = (daily_change_abs / previous_close) * 100
+
+    one_year_return_pct = ((current_price - one_year_ago_price) / one_year_ago_price) * 100
+
+    return {
+        "current_price": current_price,
+        "daily_change_abs": daily_change_abs,
+        "daily_change_pct": daily_change_pct,
+        "one_year_return_pct": one_year_return_pct,
+        "history": hist
+    }
+
+def read_json(path):
+    return orjson.loads(path.read_bytes())
+
+def json_writer(obj):
+    def write(path):
+        path.write_bytes(orjson.dumps(obj))
+    return write
+
+# The fetch helpers below run on worker threads, which don't inherit the caller's
+# st.columns container, so they never draw: errors come back per ticker/query and
+# the script thread shows them where they belong
+@st.cache_data(ttl=PRICE_CACHE_TTL)
+def get_stocks_data(tickers):
+    histories = {}
+    errors = {}
+    for ticker in tickers:
+        hist = read_disk_cache(f"{ticker}_1y.parquet", PRICE_CACHE_TTL, pd.read_parquet)
+        if hist is not None:
+            histories[ticker] = hist
+
+    # One batched yf.download for everything the disk cache couldn't serve
+    missing = [ticker for ticker in tickers if ticker not in histories]
+    if missing:
+        try:
+            data = yf.download(missing, period="1y", group_by="ticker", threads=True, progress=False)
+        except Exception as e:
+            errors.update((ticker, f"Error fetching data for {ticker}: {e}") for ticker in missing)
+            data = None
+        if data is not None:
+            for ticker in missing:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if ticker not in data.columns.get_level_values(0):
+                        continue
+                    hist = data[ticker].dropna(how="all")
+                else:
+                    hist = data
+                if not hist.empty:
+                    write_disk_cache(f"{ticker}_1y.parquet", hist.to_parquet)
+                histories[ticker] = hist
+
+    results = {}
+    for ticker in tickers:
+        if ticker not in histories:
+            continue
+        try:
+            stock_data = summarize_history(histories[ticker])
+        except Exception as e:
+            errors[ticker] = f"Error fetching data for {ticker}: {e}"
+            continue
+        if stock_data:
+            results[ticker] = stock_data
+    return results, errors
+
+def get_stock_data(ticker, prefetched=()):
+    """Return ``(summary, error message)`` for ``ticker``; either may be None."""
+    results, errors = st.session_state.get("prefetched", ({}, {}))
+    if ticker in results:
+        return results[ticker], None
+    # Reuse the batched cache entry when the ticker was part of the prefetch
+    tickers = tuple(prefetched) if ticker in prefetched else (ticker,)
+    results, errors = get_stocks_data(tickers)
+    return results.get(ticker), errors.get(ticker)
+
+async def _fetch_news(session, query, api_key, num_articles):
+    url = f"https://newsapi.org/v2/everything?q={query}&sortBy=relevancy&searchIn=title&language=en&apiKey={api_key}&pageSize={num_articles}"
+    async with session.get(url) as response:
+        return orjson.loads(await response.read())
+
+async def _fetch_news_batch(queries, api_key, num_articles):
+    # All lookups share one pooled connector and overlap on a single event loop
+    connector = aiohttp.TCPConnector(limit=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=5)) as session:
+        return await asyncio.gather(
+            *[_fetch_news(session, query, api_key, num_articles) for query in queries],
+            return_exceptions=True
+        )
 
-@st.cache_data
-def get_stock_data(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1y")
-        if not hist.empty:
-            current_price = hist["Close"].iloc[-1]
-            previous_close = hist["Close"].iloc[-2]
-            daily_change_abs = current_price - previous_close
-            daily_change_pct = (daily_change_abs / previous_close) * 100
-
-            one_year_ago_price = hist["Close"].iloc[0]
-            one_year_return_pct = ((current_price - one_year_ago_price) / one_year_ago_price) * 100
-
-            return {
-                "current_price": current_price,
-                "daily_change_abs": daily_change_abs,
-                "daily_change_pct": daily_change_pct,
-                "one_year_return_pct": one_year_return_pct,
-                "history": hist
-            }
+@st.cache_data(ttl=NEWS_CACHE_TTL)
+def fetch_news_batch(queries, api_key, num_articles=5):
+    news = {}
+    errors = {}
+    for query in queries:
+        articles = read_disk_cache(f"news_{query}_{num_articles}.json", NEWS_CACHE_TTL, read_json)
+        if articles is not None:
+            news[query] = articles
+
+    missing = [query for query in queries if query not in news]
+    if not missing:
+        return news, errors
+
+    results = asyncio.run(_fetch_news_batch(missing, api_key, num_articles))
+    for query, data in zip(missing, results):
+        if isinstance(data, Exception):
+            errors[query] = f"Error fetching news: {data}"
+            news[query] = []
+        elif data.get("status") == "ok":
+            # Only the title and link are rendered, so keep nothing else in the caches
+            articles = [{"title": a["title"], "url": a["url"]} for a in data["articles"]]
+            news[query] = articles
+            write_disk_cache(f"news_{query}_{num_articles}.json", json_writer(articles))
         else:
-            return None
-    except Exception as e:
-        st.error(f"Error fetching data for {ticker}: {e}")
-        return None
+            errors[query] = f"Error fetching news: {data.get('message', 'Unknown error')}"
+            news[query] = []
+    return news, errors
+
+def get_financial_news(query, api_key, num_articles=5, prefetched=()):
+    """Return ``(articles, error message)`` for ``query``; the error is None on success."""
+    # Sorted so the same set of tickers always maps to the same cache entry
+    queries = tuple(sorted(prefetched)) if query in prefetched else (query,)
+    news, errors = fetch_news_batch(queries, api_key, num_articles)
+    return news.get(query, []), errors.get(query)
+
+@st.cache_resource
+def build_risk_fig():
+    # Built from static data only, so one figure serves every rerun
+    risk_comparison_data = pd.DataFrame({
+        'Risk Level': ['Conservative', 'Balanced', 'Aggressive'],
+        'Expected Return (%)': [5, 8, 12],
+        'Risk Score': [2, 5, 8]
+    })
+
+    fig_risk = px.scatter(
+        risk_comparison_data,
+        x='Risk Score',
+        y='Expected Return (%)',
+        size='Expected Return (%)',
+        color='Risk Level',
+        title="Risk vs Expected Return Profile",
+        color_discrete_map={
+            'Conservative': '#28a745',
+            'Balanced': '#ffc107', 
+            'Aggressive': '#dc3545'
+        }
+    )
+    fig_risk.update_layout(**COMMON_LAYOUT)
+    fig_risk.update_xaxes(title='Risk Level (1-10)')
+    fig_risk.update_yaxes(title='Expected Annual Return (%)')
+    return fig_risk
 
 @st.cache_data
-def get_financial_news(query, api_key, num_articles=5):
-    if api_key == "YOUR_NEWS_API_KEY":
-        st.warning("Please replace 'YOUR_NEWS_API_KEY' with your actual NewsAPI key to fetch live news.")
-        return []
-    
-    url = f"https://newsapi.org/v2/everything?q={query}&sortBy=relevancy&apiKey={api_key}&pageSize={num_articles}"
-    try:
-        response = requests.get(url)
-        data = response.json()
-        if data["status"] == "ok":
-            return data["articles"]
-        else:
-            st.error(f"Error fetching news: {data.get('message', 'Unknown error')}")
-            return []
-    except Exception as e:
-        st.error(f"Error fetching news: {e}")
-        return []
+def make_simulation_csv(amount, annual_return, horizon, projected_value):
+    df_projection = pd.DataFrame({
+        'Investment Amount': [amount],
+        'Expected Annual Return': [annual_return],
+        'Investment Horizon (Years)': [horizon],
+        'Projected Value': [projected_value]
+    })
+    return df_projection.to_csv(index=False).encode('utf-8')
 
 # --- Streamlit App --- #
 st.set_page_config(layout="wide", page_title="InvestoPal")
@@ -99,11 +248,20 @@ investment_amount = st.sidebar.number_input(
 
 investment_horizon = st.sidebar.selectbox(
     "Investment Horizon (years)",
-    (1, 3, 5, 10, 15, 20)
+    INVESTMENT_HORIZONS
 )
 
 selected_profile = RISK_PROFILES[risk_tolerance]
 
+# Prefetch every recommended stock in one request when the profile changes,
+# so switching between them is a session-state lookup; the copy is refreshed
+# once it's older than PRICE_CACHE_TTL, like the cache behind it
+if (st.session_state.get("prefetched_profile") != risk_tolerance
+        or time.time() - st.session_state.get("prefetched_at", 0) > PRICE_CACHE_TTL):
+    st.session_state["prefetched"] = get_stocks_data(tuple(selected_profile['example_stocks']))
+    st.session_state["prefetched_profile"] = risk_tolerance
+    st.session_state["prefetched_at"] = time.time()
+
 st.sidebar.subheader("Risk Profile Details:")
 st.sidebar.write(f"**Type:** {risk_tolerance}")
 st.sidebar.write(f"**Description:** {selected_profile['description']}")
@@ -124,7 +282,16 @@ with col1:
     )
 
     if selected_stock:
-        stock_data = get_stock_data(selected_stock)
+        # Price history and news come from independent services, so wait on both at once;
+        # the workers only fetch, and any message is drawn here inside col1
+        news_key_missing = NEWS_API_KEY == "YOUR_NEWS_API_KEY"
+        with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as ex:
+            f_stock = ex.submit(get_stock_data, selected_stock, selected_profile['example_stocks'])
+            f_news = None if news_key_missing else ex.submit(get_financial_news, selected_stock, NEWS_API_KEY, prefetched=selected_profile['example_stocks'])
+            stock_data, stock_error = f_stock.result()
+            news_articles, news_error = f_news.result() if f_news else ([], None)
+        if stock_error:
+            st.error(stock_error)
         if stock_data:
             st.write(f"### {selected_stock}")
             st.write(f"**Current Price:** ₹{stock_data['current_price']:.2f}")
@@ -139,24 +306,19 @@ with col1:
                 title=f"{selected_stock} Closing Price (1 Year)",
                 color_discrete_sequence=['#007bff']
             )
-            fig.update_layout(
-                title_font_size=16,
-                title_font_color='#2c3e50',
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(gridcolor='#e1e5e9'),
-                yaxis=dict(gridcolor='#e1e5e9')
-            )
+            fig.update_layout(**COMMON_LAYOUT)
             st.markdown('<div class="chart-container">', unsafe_allow_html=True)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
             # News Integration
             st.subheader(f"Latest News for {selected_stock}")
-            news_articles = get_financial_news(selected_stock, NEWS_API_KEY)
+            if news_key_missing:
+                st.warning("Please replace 'YOUR_NEWS_API_KEY' with your actual NewsAPI key to fetch live news.")
+            elif news_error:
+                st.error(news_error)
             if news_articles:
-                for article in news_articles:
-                    st.markdown(f"- [{article['title']}]({article['url']})")
+                st.markdown("\n".join(f"- [{a['title']}]({a['url']})" for a in news_articles))
             else:
                 st.info("No news found or API key is missing/invalid.")
 
@@ -164,13 +326,13 @@ with col2:
     st.subheader("Investment Insights & Projections")
     
     # Create projection visualization
-    years = list(range(1, investment_horizon + 1))
-    projected_values = [calculate_projected_value(investment_amount, selected_profile['expected_return'], year) for year in years]
+    years = np.arange(1, investment_horizon + 1)
+    projected_values = investment_amount * PROJECTION_FACTORS[(selected_profile['expected_return'], investment_horizon)]
     
     projection_df = pd.DataFrame({
-        'Year': years,
-        'Projected Value (₹)': projected_values
-    })
+        'Year': years.astype(np.int32),
+        'Projected Value (₹)': projected_values.astype(np.float64)
+    }, copy=False)
     
     # Create projection chart
     fig_projection = px.bar(
@@ -181,25 +343,14 @@ with col2:
         color='Projected Value (₹)',
         color_continuous_scale='Blues'
     )
-    fig_projection.update_layout(
-        title_font_size=16,
-        title_font_color='#2c3e50',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(gridcolor='#e1e5e9'),
-        yaxis=dict(gridcolor='#e1e5e9')
-    )
+    fig_projection.update_layout(**COMMON_LAYOUT)
     
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.plotly_chart(fig_projection, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Summary metrics
-    final_projected_value = calculate_projected_value(
-        investment_amount,
-        selected_profile['expected_return'],
-        investment_horizon
-    )
+    final_projected_value = projected_values[-1]
     total_gain = final_projected_value - investment_amount
     
     col2_1, col2_2 = st.columns(2)
@@ -276,46 +427,17 @@ with col2:
     
     # Risk comparison chart
     st.subheader("Risk vs Return Comparison")
-    risk_comparison_data = pd.DataFrame({
-        'Risk Level': ['Conservative', 'Balanced', 'Aggressive'],
-        'Expected Return (%)': [5, 8, 12],
-        'Risk Score': [2, 5, 8]
-    })
-    
-    fig_risk = px.scatter(
-        risk_comparison_data,
-        x='Risk Score',
-        y='Expected Return (%)',
-        size='Expected Return (%)',
-        color='Risk Level',
-        title="Risk vs Expected Return Profile",
-        color_discrete_map={
-            'Conservative': '#28a745',
-            'Balanced': '#ffc107', 
-            'Aggressive': '#dc3545'
-        }
-    )
-    fig_risk.update_layout(
-        title_font_size=16,
-        title_font_color='#2c3e50',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(gridcolor='#e1e5e9', title='Risk Level (1-10)'),
-        yaxis=dict(gridcolor='#e1e5e9', title='Expected Annual Return (%)')
-    )
-    
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    st.plotly_chart(fig_risk, use_container_width=True)
+    st.plotly_chart(build_risk_fig(), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Export simulation results as CSV
-    df_projection = pd.DataFrame({
-        'Investment Amount': [investment_amount],
-        'Expected Annual Return': [selected_profile['expected_return']],
-        'Investment Horizon (Years)': [investment_horizon],
-        'Projected Value': [final_projected_value]
-    })
-    csv = df_projection.to_csv(index=False).encode('utf-8')
+    csv = make_simulation_csv(
+        investment_amount,
+        selected_profile['expected_return'],
+        investment_horizon,
+        final_projected_value
+    )
     st.download_button(
         label="Export Simulation Results as CSV",
         data=csv,
@@ -0,0 +1,36 @@
+# On-disk cache shared by the InvestoPal apps: files survive Streamlit restarts,
+# and each app keeps st.cache_data in front of it
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(".investopal_cache")
+# Every write sweeps files older than this. It matches the longest TTL any reader uses
+# for live data; date-keyed names roll forward daily, so without it the directory
+# would only ever grow
+MAX_AGE = 6 * 3600  # seconds
+
+def read_disk_cache(name, ttl, reader):
+    path = CACHE_DIR / name
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            return reader(path)
+    except Exception:
+        pass
+    return None
+
+def write_disk_cache(name, writer):
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        writer(CACHE_DIR / name)
+    except Exception:
+        pass
+    prune_disk_cache()
+
+def prune_disk_cache(max_age=MAX_AGE):
+    cutoff = time.time() - max_age
+    for path in CACHE_DIR.glob("*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
@@ -5,6 +5,29 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime
+from math import sqrt
+
+try:
+    from numba import config as numba_config, njit, prange
+    # TBB workers spawned from Streamlit's script thread hang interpreter exit; prefer OpenMP
+    numba_config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # No-op stand-in so the kernels below still define without numba installed
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+from disk_cache import read_disk_cache, write_disk_cache
 
 st.set_page_config(layout="wide", page_title="InvestoPal", page_icon="📈")
 
@@ -56,53 +79,236 @@ RISK_CATEGORIES = {
 }
 
 # ---------- Caching ----------
-@st.cache_data(show_spinner=False)
-def get_stock_data(ticker, start_date, end_date):
+# Parquet files in the shared disk cache (disk_cache.py); st.cache_data sits in front of them
+PRICE_CACHE_TTL = 6 * 3600  # seconds, only for ranges that reach today
+
+# Same TTL as the disk layer, so a range ending today is refetched from Yahoo once it goes stale
+@st.cache_data(ttl=PRICE_CACHE_TTL, show_spinner=False)
+def get_stock_data_multi(tickers, start_date, end_date):
+    start_date = pd.to_datetime(start_date)
+    end_date = pd.to_datetime(end_date)
+    # A closed historical range never changes; one ending today goes stale. The disk
+    # sweep still drops either kind once it is older than disk_cache.MAX_AGE
+    ttl = PRICE_CACHE_TTL if end_date.date() >= datetime.now().date() else float("inf")
+
+    results = {}
+    for t in tickers:
+        frame = read_disk_cache(f"{t}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.parquet", ttl, pd.read_parquet)
+        if frame is not None:
+            results[t] = frame
+
+    # One yf.download for every ticker the disk cache couldn't serve, split per ticker
+    missing = [t for t in tickers if t not in results]
+    if not missing:
+        return results
     try:
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
-        data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-        if data.empty:
-            return None
-        return data
+        # auto_adjust pins the column set to an adjusted "Close"; actions=False drops Dividends/Stock Splits
+        data = yf.download(missing, start=start_date, end=end_date, progress=False, auto_adjust=True, actions=False)
     except:
-        return None
-
-def calculate_risk_metrics(data, ticker):
+        return results
     if data is None or data.empty:
-        return None
+        return results
 
-    if isinstance(data.columns, pd.MultiIndex):
-        if ("Adj Close", ticker) in data.columns:
-            adj_close = data[("Adj Close", ticker)]
-        elif ("Close", ticker) in data.columns:
-            adj_close = data[("Close", ticker)]
-        else:
-            return None
-    else:
-        if "Adj Close" in data.columns:
-            adj_close = data["Adj Close"]
-        elif "Close" in data.columns:
-            adj_close = data["Close"]
+    for t in missing:
+        try:
+            frame = data.xs(t, level=1, axis=1).dropna(how="all")
+        except KeyError:
+            continue
+        if not frame.empty:
+            write_disk_cache(f"{t}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.parquet", frame.to_parquet)
+            results[t] = frame
+    return results
+
+# Trading days per year; numba freezes module-level floats into the kernel as constants
+_ANN = 252.0
+_SQRT_ANN = sqrt(_ANN)
+
+# Every fast-math flag except nnan/ninf: the rolling output carries NaNs
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+# Explicit signature: compiled (or loaded from the on-disk cache) at import time
+# rather than on the first Run Analysis click
+@njit("Tuple((float64, float64, float64, float64, float64, float64[:]))(float64[:], int64)", cache=True, fastmath=_FASTMATH)
+def _all_metrics_nb(prices, w):
+    # One pass over prices: returns, Welford mean/variance, running peak for
+    # drawdown and a w-day rolling std from centred window sums
+    n = prices.size
+    m = n - 1
+    returns = np.empty(m)
+    rolling = np.empty(m)
+    shift = prices[1] / prices[0] - 1.0
+    mean = 0.0
+    m2 = 0.0
+    s = 0.0
+    s2 = 0.0
+    peak = prices[0]
+    min_dd = 0.0
+    for i in range(1, n):
+        p = prices[i]
+        j = i - 1
+        r = p / prices[j] - 1.0
+        returns[j] = r
+
+        delta = r - mean
+        mean += delta / i
+        m2 += delta * (r - mean)
+
+        if p > peak:
+            peak = p
+        dd = p / peak - 1.0
+        if dd < min_dd:
+            min_dd = dd
+
+        v = r - shift
+        s += v
+        s2 += v * v
+        if j >= w:
+            old = returns[j - w] - shift
+            s -= old
+            s2 -= old * old
+        if j >= w - 1:
+            var = (s2 - s * s / w) / (w - 1)
+            rolling[j] = np.sqrt(var) * _SQRT_ANN if var > 0.0 else 0.0
         else:
-            return None
+            rolling[j] = np.nan
+
+    std = np.sqrt(m2 / (m - 1))
+    sharpe = (mean / std) * _SQRT_ANN if std != 0.0 else 0.0
+    total_return = (prices[m] / prices[0] - 1.0) * 100.0
+    return std * _SQRT_ANN, mean * _ANN, min_dd, sharpe, total_return, rolling
+
+# Same fast-math set as above (nnan would fold away the isnan checks below);
+# one ticker per row so each prange iteration walks contiguous memory
+@njit("float64[:, ::1](float64[:, ::1])", parallel=True, cache=True, fastmath=_FASTMATH)
+def _metrics_matrix_nb(prices_2d):
+    # Per row: (vol, avg_return, max_drawdown, sharpe, total_return), skipping
+    # NaNs from aligning tickers with different trading calendars
+    k, t = prices_2d.shape
+    out = np.full((k, 5), np.nan)
+    for j in prange(k):
+        row = prices_2d[j]
+        first = np.nan
+        prev = np.nan
+        peak = np.nan
+        min_dd = 0.0
+        mean = 0.0
+        m2 = 0.0
+        m = 0
+        for i in range(t):
+            p = row[i]
+            if np.isnan(p):
+                continue
+            if np.isnan(first):
+                first = p
+                peak = p
+            else:
+                r = p / prev - 1.0
+                m += 1
+                delta = r - mean
+                mean += delta / m
+                m2 += delta * (r - mean)
+                if p > peak:
+                    peak = p
+                dd = p / peak - 1.0
+                if dd < min_dd:
+                    min_dd = dd
+            prev = p
+        if np.isnan(first):
+            continue
+        std = np.sqrt(m2 / (m - 1)) if m > 1 else np.nan
+        if m > 0:
+            out[j, 1] = mean * _ANN
+            out[j, 3] = (mean / std) * _SQRT_ANN if std != 0.0 else 0.0
+        out[j, 0] = std * _SQRT_ANN
+        out[j, 2] = min_dd
+        out[j, 4] = (prev / first - 1.0) * 100.0
+    return out
 
-    adj_close = adj_close.dropna()
-    if adj_close.empty:
+def extract_series(data, field, ticker):
+    """Return ``field`` as a float64 ndarray plus its index.
+
+    Works for both flat and (field, ticker) MultiIndex columns; returns
+    ``(None, None)`` when the column doesn't exist.
+    """
+    key = field if data.columns.nlevels == 1 else (field, ticker)
+    if key not in data.columns:
+        return None, None
+    s = data[key]
+    return s.to_numpy(np.float64, copy=False), s.index
+
+def _frame_bytes(df):
+    # Content key for st.cache_data: raw float64 values plus the date index
+    return df.index.to_numpy().tobytes() + df.to_numpy(np.float64).tobytes() + repr(list(df.columns)).encode()
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _frame_bytes})
+def compute_risk_metrics(data, ticker):
+    if data is None or data.empty:
         return None
 
-    returns = adj_close.pct_change().dropna()
-    rolling_vol = returns.rolling(30).std() * np.sqrt(252)
+    prices, index = extract_series(data, "Close", ticker)
+    if prices is None:
+        return None
+    valid = ~np.isnan(prices)
+    prices, index = prices[valid], index[valid]
+    if prices.size == 0:
+        return None
+
+    if NUMBA_AVAILABLE and prices.size > 2:
+        vol, avg_return, max_drawdown, sharpe, total_return, rolling = _all_metrics_nb(prices, 30)
+        return {
+            "volatility": vol,
+            "avg_return": avg_return,
+            "max_drawdown": max_drawdown,
+            "sharpe_ratio": sharpe,
+            "rolling_volatility": (rolling, index[1:].to_numpy()) if rolling.size >= 30 else None,
+            "total_return": total_return
+        }
+
+    returns = prices[1:] / prices[:-1] - 1.0
+    returns_std = returns.std(ddof=1)
+    returns_mean = returns.mean()
+    # Fewer than 30 returns would give an all-NaN window; skip the rolling pass.
+    # Without numba, bottleneck's moving std is the next fastest option before pandas rolling
+    if returns.size < 30:
+        rolling_vol = None
+    elif bn is not None:
+        rolling_vol = pd.Series(bn.move_std(returns, window=30, min_count=30, ddof=1), index=index[1:]) * _SQRT_ANN
+    else:
+        rolling_vol = pd.Series(returns, index=index[1:]).rolling(30).std() * _SQRT_ANN
 
     return {
-        "volatility": returns.std() * np.sqrt(252),
-        "avg_return": returns.mean() * 252,
-        "max_drawdown": ((adj_close / adj_close.cummax()) - 1).min(),
-        "sharpe_ratio": (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0,
-        "rolling_volatility": rolling_vol,
-        "total_return": (adj_close.iloc[-1] / adj_close.iloc[0] - 1) * 100
+        "volatility": returns_std * _SQRT_ANN,
+        "avg_return": returns_mean * _ANN,
+        "max_drawdown": float((prices / np.maximum.accumulate(prices) - 1.0).min()),
+        "sharpe_ratio": (returns_mean / returns_std) * _SQRT_ANN if returns_std != 0 else 0,
+        "rolling_volatility": None if rolling_vol is None else (rolling_vol.to_numpy(), rolling_vol.index.to_numpy()),
+        "total_return": (prices[-1] / prices[0] - 1) * 100
     }
 
+def calculate_risk_metrics(data, ticker):
+    # The cache stores the rolling volatility as plain arrays; rebuild the Series per call
+    metrics = compute_risk_metrics(data, ticker)
+    if metrics is None:
+        return None
+    if metrics["rolling_volatility"] is None:
+        return metrics
+    values, index = metrics["rolling_volatility"]
+    return {**metrics, "rolling_volatility": pd.Series(values, index=index)}
+
+def compare_risk_metrics(all_data, tickers):
+    # Scalar metrics for every comparison ticker; one parallel kernel call over
+    # the date-aligned price matrix when numba is available
+    tickers = [t for t in dict.fromkeys(tickers) if all_data.get(t) is not None]
+    if not tickers:
+        return {}
+    if not NUMBA_AVAILABLE:
+        metrics = {t: calculate_risk_metrics(all_data[t], t) for t in tickers}
+        return {t: m for t, m in metrics.items() if m}
+    closes = pd.DataFrame({t: all_data[t]["Close"] for t in tickers})
+    out = _metrics_matrix_nb(np.ascontiguousarray(closes.to_numpy(np.float64).T))
+    keys = ("volatility", "avg_return", "max_drawdown", "sharpe_ratio", "total_return")
+    return {t: dict(zip(keys, row.tolist())) for t, row in zip(tickers, out) if not np.isnan(row[4])}
+
 def categorize_risk(volatility):
     if volatility < 0.2:
         return "Conservative"
@@ -110,25 +316,32 @@ def categorize_risk(volatility):
         return "Moderate"
     return "Aggressive"
 
-def create_advanced_chart(stock_data, metrics, ticker):
-    if isinstance(stock_data.columns, pd.MultiIndex):
-        if ("Adj Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Adj Close", ticker)]
-        elif ("Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Close", ticker)]
-        else:
-            return None
-        volume_data = stock_data[("Volume", ticker)] if ("Volume", ticker) in stock_data.columns else None
-    else:
-        price_data = stock_data["Adj Close"] if "Adj Close" in stock_data.columns else stock_data["Close"]
-        volume_data = stock_data["Volume"] if "Volume" in stock_data.columns else None
+@st.cache_resource
+def chart_skeleton():
+    # Subplot grid, template and empty trace stubs, built once and copied per chart
+    fig = make_subplots(rows=3, cols=1, subplot_titles=('Price', 'Volume', 'Rolling Volatility'))
+    fig.add_trace(go.Scatter(name='Price'), row=1, col=1)
+    fig.add_trace(go.Bar(name='Volume'), row=2, col=1)
+    fig.add_trace(go.Scatter(name='Volatility'), row=3, col=1)
+    fig.update_layout(height=800, template='plotly_white')
+    return fig
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _frame_bytes})
+def create_advanced_chart(stock_data, _metrics, ticker):
+    # _metrics is derived from stock_data, so Streamlit skips hashing it
+    price_data, _ = extract_series(stock_data, "Close", ticker)
+    if price_data is None:
+        return None
+    volume_data, _ = extract_series(stock_data, "Volume", ticker)
 
-    fig = make_subplots(rows=3, cols=1, subplot_titles=(f'{ticker} Price', 'Volume', 'Rolling Volatility'))
-    fig.add_trace(go.Scatter(x=stock_data.index, y=price_data, name='Price'), row=1, col=1)
+    # Copy rather than mutate: the cached skeleton is shared by every session
+    fig = go.Figure(chart_skeleton())
+    fig.layout.annotations[0].text = f'{ticker} Price'
+    fig.data[0].update(x=stock_data.index, y=price_data)
     if volume_data is not None:
-        fig.add_trace(go.Bar(x=stock_data.index, y=volume_data, name='Volume'), row=2, col=1)
-    fig.add_trace(go.Scatter(x=stock_data.index, y=metrics['rolling_volatility'], name='Volatility'), row=3, col=1)
-    fig.update_layout(height=800, template='plotly_white')
+        fig.data[1].update(x=stock_data.index, y=volume_data)
+    if _metrics['rolling_volatility'] is not None:
+        fig.data[2].update(x=stock_data.index, y=_metrics['rolling_volatility'])
     return fig
 
 def generate_ai_advice(ticker, risk_category, metrics, selected_risk):
@@ -141,10 +354,14 @@ def generate_ai_advice(ticker, risk_category, metrics, selected_risk):
         advice.append(f"⚠️ Poor risk-adjusted returns.")
     return advice
 
+@st.cache_resource(ttl=60, show_spinner=False)
+def ticker_obj(sym):
+    # Shared yf.Ticker per symbol; it memoises news on itself, so the TTL keeps it fresh
+    return yf.Ticker(sym)
+
 def get_latest_news(ticker, limit=3):
     try:
-        ticker_obj = yf.Ticker(ticker)
-        news = ticker_obj.news
+        news = ticker_obj(ticker).news
         return news[:limit] if news else []
     except:
         return []
@@ -173,7 +390,9 @@ else:
     end_date = st.date_input("End Date:", pd.to_datetime("2024-01-01"))
 
 if st.button("🚀 Run Analysis"):
-    stock_data = get_stock_data(ticker, start_date, end_date)
+    compare_list = [t.strip().upper() for t in compare_tickers.split(",") if t.strip()]
+    all_data = get_stock_data_multi(tuple(dict.fromkeys([ticker, *compare_list])), start_date, end_date)
+    stock_data = all_data.get(ticker)
     if stock_data is not None:
         metrics = calculate_risk_metrics(stock_data, ticker)
         if metrics:
@@ -181,17 +400,15 @@ if st.button("🚀 Run Analysis"):
 
             # 1. Key Stats Table
             st.subheader("📊 Key Statistics")
-            stats_df = pd.DataFrame({
-                "Metric": ["Total Return %", "Annualized Return %", "Volatility %", "Sharpe Ratio", "Max Drawdown %"],
-                "Value": [
-                    f"{metrics['total_return']:.2f}%",
-                    f"{metrics['avg_return']*100:.2f}%",
-                    f"{metrics['volatility']*100:.2f}%",
-                    f"{metrics['sharpe_ratio']:.2f}",
-                    f"{metrics['max_drawdown']*100:.2f}%"
-                ]
-            })
-            st.table(stats_df)
+            # Five rows of preformatted strings: a markdown table skips the DataFrame + Arrow round trip
+            stats_rows = (
+                ("Total Return %", f"{metrics['total_return']:.2f}%"),
+                ("Annualized Return %", f"{metrics['avg_return']*100:.2f}%"),
+                ("Volatility %", f"{metrics['volatility']*100:.2f}%"),
+                ("Sharpe Ratio", f"{metrics['sharpe_ratio']:.2f}"),
+                ("Max Drawdown %", f"{metrics['max_drawdown']*100:.2f}%"),
+            )
+            st.markdown("| Metric | Value |\n|---|---|\n" + "\n".join(f"| {m} | {v} |" for m, v in stats_rows))
 
             # 2. Risk Gauge
             st.subheader("📈 Risk Gauge")
@@ -225,11 +442,9 @@ if st.button("🚀 Run Analysis"):
 
         if compare_tickers:
             st.subheader("📊 Portfolio Comparison")
-            for comp in [t.strip().upper() for t in compare_tickers.split(",")]:
-                comp_data = get_stock_data(comp, start_date, end_date)
-                if comp_data is not None:
-                    comp_metrics = calculate_risk_metrics(comp_data, comp)
-                    if comp_metrics:
-                        st.write(f"{comp}: {comp_metrics['total_return']:.2f}% Return")
+            comp_metrics = compare_risk_metrics(all_data, compare_list)
+            for comp in compare_list:
+                if comp in comp_metrics:
+                    st.write(f"{comp}: {comp_metrics[comp]['total_return']:.2f}% Return")
     else:
         st.error("No data available for the selected ticker and date range.")
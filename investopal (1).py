@@ -60,17 +60,35 @@ def get_stock_data(ticker, start_date, end_date):
     except:
         return None
 
+def field_series(data, field, ticker):
+    # yf.download keys columns as (field, ticker) even for a single symbol; None when missing
+    key = (field, ticker) if isinstance(data.columns, pd.MultiIndex) else field
+    return data[key] if key in data.columns else None
+
+def price_series(data, ticker):
+    # auto_adjust=True (the yfinance default) leaves only an adjusted "Close"
+    adj_close = field_series(data, "Adj Close", ticker)
+    return adj_close if adj_close is not None else field_series(data, "Close", ticker)
+
 def calculate_risk_metrics(data, ticker):
     if data is None or data.empty:
         return None
-    adj_close = data["Adj Close"]
+    adj_close = price_series(data, ticker)
+    if adj_close is None:
+        return None
     returns = adj_close.pct_change().dropna()
     rolling_vol = returns.rolling(30).std() * np.sqrt(252)
+    # Drawdown against the running peak in plain NumPy (cummax skips NaNs, so drop them first)
+    prices = adj_close.dropna().to_numpy(np.float64)
+    max_drawdown = float((prices / np.maximum.accumulate(prices) - 1.0).min()) if prices.size else np.nan
+    # One pass each for mean and std, reused below
+    returns_mean = returns.mean()
+    returns_std = returns.std()
     return {
-        "volatility": returns.std() * np.sqrt(252),
-        "avg_return": returns.mean() * 252,
-        "max_drawdown": ((adj_close / adj_close.cummax()) - 1).min(),
-        "sharpe_ratio": (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0,
+        "volatility": returns_std * np.sqrt(252),
+        "avg_return": returns_mean * 252,
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": (returns_mean / returns_std) * np.sqrt(252) if returns_std != 0 else 0,
         "rolling_volatility": rolling_vol,
         "total_return": (adj_close.iloc[-1] / adj_close.iloc[0] - 1) * 100
     }
@@ -84,8 +102,10 @@ def categorize_risk(volatility):
 
 def create_advanced_chart(stock_data, metrics, ticker):
     fig = make_subplots(rows=3, cols=1, subplot_titles=(f'{ticker} Price', 'Volume', 'Rolling Volatility'))
-    fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data["Adj Close"], name='Price'), row=1, col=1)
-    fig.add_trace(go.Bar(x=stock_data.index, y=stock_data["Volume"], name='Volume'), row=2, col=1)
+    fig.add_trace(go.Scatter(x=stock_data.index, y=price_series(stock_data, ticker), name='Price'), row=1, col=1)
+    volume = field_series(stock_data, "Volume", ticker)
+    if volume is not None:
+        fig.add_trace(go.Bar(x=stock_data.index, y=volume, name='Volume'), row=2, col=1)
     fig.add_trace(go.Scatter(x=stock_data.index, y=metrics['rolling_volatility'], name='Volatility'), row=3, col=1)
     fig.update_layout(height=800, template='plotly_white')
     return fig
@@ -140,6 +160,7 @@ if st.button("🚀 Run Analysis"):
                 comp_data = get_stock_data(comp, start_date, end_date)
                 if comp_data is not None:
                     comp_metrics = calculate_risk_metrics(comp_data, comp)
-                    st.write(f"{comp}: {comp_metrics['total_return']:.2f}% Return")
+                    if comp_metrics:
+                        st.write(f"{comp}: {comp_metrics['total_return']:.2f}% Return")
     else:
         st.error("No data available for the selected ticker and date range.")
@@ -6,6 +6,8 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 st.set_page_config(layout="wide", page_title="InvestoPal", page_icon="📈")
 
@@ -60,38 +62,56 @@ def get_stock_data(ticker, start_date, end_date):
     except:
         return None
 
-def calculate_risk_metrics(data, ticker):
-    if data is None or data.empty:
+def rolling_std(values, window):
+    # O(n) rolling sample std from running sums; NaN until the first full window, like pandas
+    out = np.full(values.shape, np.nan)
+    if values.size < window:
+        return out
+    c1 = np.concatenate(([0.0], np.cumsum(values)))
+    c2 = np.concatenate(([0.0], np.cumsum(values * values)))
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+    var = (s2 - s1 * s1 / window) / (window - 1)
+    out[window - 1:] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+def price_series(data, ticker):
+    # Prefer Adj Close, fall back to Close; MultiIndex is checked once per frame
+    multi = isinstance(data.columns, pd.MultiIndex)
+    for field in ("Adj Close", "Close"):
+        try:
+            return data[(field, ticker)] if multi else data[field]
+        except KeyError:
+            continue
+    return None
+
+def _series_key(s):
+    # get_stock_data already caches on (ticker, dates), so the date range and length identify the series
+    if s.empty:
+        return (0,)
+    return (s.name, s.index[0], s.index[-1], len(s))
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.Series: _series_key})
+def calculate_risk_metrics(adj_close, ticker):
+    if adj_close is None:
         return None
 
-    # Handle MultiIndex (multiple tickers) and fallback to 'Close' if needed
-    if isinstance(data.columns, pd.MultiIndex):
-        if ("Adj Close", ticker) in data.columns:
-            adj_close = data[("Adj Close", ticker)]
-        elif ("Close", ticker) in data.columns:
-            adj_close = data[("Close", ticker)]
-        else:
-            return None
-    else:
-        if "Adj Close" in data.columns:
-            adj_close = data["Adj Close"]
-        elif "Close" in data.columns:
-            adj_close = data["Close"]
-        else:
-            return None
-
     adj_close = adj_close.dropna()
     if adj_close.empty:
         return None
 
-    returns = adj_close.pct_change().dropna()
-    rolling_vol = returns.rolling(30).std() * np.sqrt(252)
+    # adj_close has no gaps left, so simple returns are a straight ndarray slice
+    p = adj_close.to_numpy()
+    returns = p[1:] / p[:-1] - 1.0
+    returns_std = returns.std(ddof=1)
+    returns_mean = returns.mean()
+    rolling_vol = pd.Series(rolling_std(returns, 30), index=adj_close.index[1:]) * np.sqrt(252)
 
     return {
-        "volatility": returns.std() * np.sqrt(252),
-        "avg_return": returns.mean() * 252,
-        "max_drawdown": ((adj_close / adj_close.cummax()) - 1).min(),
-        "sharpe_ratio": (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0,
+        "volatility": returns_std * np.sqrt(252),
+        "avg_return": returns_mean * 252,
+        "max_drawdown": float(((p / np.maximum.accumulate(p)) - 1.0).min()),
+        "sharpe_ratio": (returns_mean / returns_std) * np.sqrt(252) if returns_std != 0 else 0,
         "rolling_volatility": rolling_vol,
         "total_return": (adj_close.iloc[-1] / adj_close.iloc[0] - 1) * 100
     }
@@ -103,18 +123,13 @@ def categorize_risk(volatility):
         return "Moderate"
     return "Aggressive"
 
-def create_advanced_chart(stock_data, metrics, ticker):
-    if isinstance(stock_data.columns, pd.MultiIndex):
-        if ("Adj Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Adj Close", ticker)]
-        elif ("Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Close", ticker)]
-        else:
-            return None
-        volume_data = stock_data[("Volume", ticker)] if ("Volume", ticker) in stock_data.columns else None
-    else:
-        price_data = stock_data["Adj Close"] if "Adj Close" in stock_data.columns else stock_data["Close"]
-        volume_data = stock_data["Volume"] if "Volume" in stock_data.columns else None
+def create_advanced_chart(stock_data, price_data, metrics, ticker):
+    if price_data is None:
+        return None
+    try:
+        volume_data = stock_data[("Volume", ticker)] if isinstance(stock_data.columns, pd.MultiIndex) else stock_data["Volume"]
+    except KeyError:
+        volume_data = None
 
     fig = make_subplots(rows=3, cols=1, subplot_titles=(f'{ticker} Price', 'Volume', 'Rolling Volatility'))
     fig.add_trace(go.Scatter(x=stock_data.index, y=price_data, name='Price'), row=1, col=1)
@@ -160,23 +175,33 @@ else:
 if st.button("🚀 Run Analysis"):
     stock_data = get_stock_data(ticker, start_date, end_date)
     if stock_data is not None:
-        metrics = calculate_risk_metrics(stock_data, ticker)
+        price_data = price_series(stock_data, ticker)
+        metrics = calculate_risk_metrics(price_data, ticker)
         if metrics:
             risk_category = categorize_risk(metrics["volatility"])
             st.metric("Risk Level", risk_category)
             for a in generate_ai_advice(ticker, risk_category, metrics, selected_risk):
                 st.write(a)
-            chart = create_advanced_chart(stock_data, metrics, ticker)
+            chart = create_advanced_chart(stock_data, price_data, metrics, ticker)
             if chart:
                 st.plotly_chart(chart)
 
         if compare_tickers:
             st.subheader("📊 Portfolio Comparison")
-            for comp in [t.strip().upper() for t in compare_tickers.split(",")]:
-                comp_data = get_stock_data(comp, start_date, end_date)
+            comps = [t.strip().upper() for t in compare_tickers.split(",")]
+            # Each comparison download is an independent network wait, so run them side by side;
+            # a long list is capped at 8 threads so it can't spawn one per ticker
+            with ThreadPoolExecutor(max_workers=min(8, len(comps)), initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as ex:
+                futures = [ex.submit(get_stock_data, comp, start_date, end_date) for comp in comps]
+            lines = []
+            for comp, future in zip(comps, futures):
+                comp_data = future.result()
                 if comp_data is not None:
-                    comp_metrics = calculate_risk_metrics(comp_data, comp)
+                    comp_metrics = calculate_risk_metrics(price_series(comp_data, comp), comp)
                     if comp_metrics:
-                        st.write(f"{comp}: {comp_metrics['total_return']:.2f}% Return")
+                        lines.append(f"{comp}: {comp_metrics['total_return']:.2f}% Return")
+            # One element for the whole comparison instead of one per ticker
+            if lines:
+                st.markdown("\n\n".join(lines))
     else:
         st.error("No data available for the selected ticker and date range.")
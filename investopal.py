@@ -2,10 +2,25 @@ import streamlit as st
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import plotly.graph_objects as go
-import plotly.express as px
 from plotly.subplots import make_subplots
 from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # No-op stand-in so the kernels below still define without numba installed
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Page config
 st.set_page_config(layout="wide", page_title="InvestoPal", page_icon="📈")
@@ -13,7 +28,11 @@ st.set_page_config(layout="wide", page_title="InvestoPal", page_icon="📈")
 # ---------- Background & Styling ----------
 BACKGROUND_URL = "https://images.unsplash.com/photo-1559526324-593bc073d938?auto=format&fit=crop&w=1950&q=80"
 
-st.markdown(f"""
+@st.cache_resource
+def page_css():
+    # Formatted once per process. It still has to be emitted every run: Streamlit
+    # drops any element a rerun doesn't re-send, so a "sent once" guard loses the styles
+    return f"""
 <style>
 body {{
     background-image: url('{BACKGROUND_URL}');
@@ -56,7 +75,9 @@ body {{
     color:#cbd5e1;
 }}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(page_css(), unsafe_allow_html=True)
 
 # Main container
 st.markdown('<div class="app-overlay">', unsafe_allow_html=True)
@@ -71,168 +92,318 @@ st.sidebar.markdown("## 🔧 Investor Inputs")
 currency = st.sidebar.selectbox("Currency", ["INR (₹)","USD ($)"], index=0)
 currency_sym = "₹" if "INR" in currency else "$"
 
-investment_amount = st.sidebar.number_input("Lump-sum Investment", min_value=0, value=50000, step=1000, format="%d")
-monthly_sip = st.sidebar.number_input("Monthly SIP", min_value=0, value=10000, step=500, format="%d")
-investment_years = st.sidebar.slider("Investment Period (years)", 1, 40, 15)
-expected_return_pct = st.sidebar.slider("Expected Annual Return (%)", 0.0, 40.0, 10.0, step=0.1)
-risk_level = st.sidebar.selectbox("Risk Tolerance", ["Conservative","Moderate","Aggressive"])
 compare_tickers = st.sidebar.text_input("Compare (comma-separated tickers)", placeholder="AAPL,MSFT,GOOGL")
 
 # Stock input
 st.markdown("### 🔎 Stock Analysis")
 ticker = st.text_input("Enter stock ticker (e.g. AAPL, TSLA, RELIANCE.NS):", value="AAPL").upper().strip()
 
+# Plain date defaults; no pandas datetime parsing on every rerun
+TODAY = datetime.now().date()
+DEFAULT_START = datetime(2020, 1, 1).date()
+
 date_col1, date_col2 = st.columns(2)
 with date_col1:
-    start_date = st.date_input("Start date", pd.to_datetime("2020-01-01"))
+    start_date = st.date_input("Start date", DEFAULT_START)
 with date_col2:
-    end_date = st.date_input("End date", pd.to_datetime("today"))
+    end_date = st.date_input("End date", TODAY)
 
 run = st.button("🚀 Run Analysis")
 
 # ---------- Helpers ----------
 @st.cache_data(show_spinner=False)
-def fetch_price_history(ticker, start_date, end_date):
-    """Return historical price DataFrame (cached)."""
+def parse_tickers(text):
+    """Split a comma-separated ticker list into an upper-cased, de-duplicated tuple (input order kept)."""
+    return tuple(dict.fromkeys(t.strip().upper() for t in text.split(",") if t.strip()))
+
+@st.cache_data(show_spinner=False)
+def fetch_price_history_batch(tickers, start_date, end_date):
+    """Return {ticker: historical price DataFrame} from one threaded download (cached)."""
     try:
-        df = yf.download(ticker, start=start_date, end=end_date, progress=False)
-        if df is None or df.empty:
-            return None
-        return df
+        df = yf.download(" ".join(tickers), start=start_date, end=end_date, group_by="ticker", threads=True, progress=False)
+    except Exception:
+        return {}
+    if df is None or df.empty:
+        return {}
+    histories = {}
+    for t in tickers:
+        if t not in df.columns.get_level_values(0):
+            continue
+        hist = df[t].dropna(how="all")
+        if not hist.empty:
+            histories[t] = hist
+    return histories
+
+CARD_TPL = "<div class='card'><div class='metric'>{value}</div><div class='small'>{label}</div></div>"
+
+NEWS_TITLE_KEYS = ("title", "headline")
+NEWS_LINK_KEYS = ("link", "url")
+NEWS_PUBLISHER_KEYS = ("publisher", "source")
+NEWS_TIME_KEYS = ("providerPublishTime", "pubDate")
+
+@st.cache_resource(ttl=60, show_spinner=False)
+def ticker_obj(sym):
+    # One yf.Ticker per symbol so the live quote and news share Yahoo's cookie/crumb
+    # handshake. The object memoises fast_info and news on itself, so the short TTL
+    # is what keeps the quote live
+    return yf.Ticker(sym)
+
+def _get_live_price(ticker):
+    """Return the latest traded price, or None.
+
+    No history() fallback: the caller already has the last close in memory.
+    """
+    try:
+        return getattr(getattr(ticker_obj(ticker), "fast_info", None), "last_price", None) or None
     except Exception:
         return None
 
+def _first(item, keys, default=None):
+    """Return the first truthy value of ``keys`` in ``item``."""
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return default
+
+@st.cache_data(ttl=900, show_spinner=False)
 def get_latest_news(ticker, limit=3):
-    """Fetch latest news (non-cached to avoid returning un-serializable objects)."""
+    """Fetch latest news, normalised to plain dicts so the result can be cached."""
     try:
-        t = yf.Ticker(ticker)
-        news = getattr(t, "news", None)
+        news = getattr(ticker_obj(ticker), "news", None)
         if not news:
             return []
         cleaned = []
         for item in news[:limit]:
             if not isinstance(item, dict):
                 continue
-            title = item.get("title") or item.get("headline") or "No title"
-            link = item.get("link") or item.get("url") or "#"
-            publisher = item.get("publisher") or item.get("source") or "Unknown"
-            ts = item.get("providerPublishTime") or item.get("pubDate") or None
+            ts = _first(item, NEWS_TIME_KEYS)
             published = None
             if isinstance(ts, (int, float)):
                 try:
-                    published = datetime.fromtimestamp(int(ts)).strftime("%Y-%m-%d %H:%M")
-                except Exception:
+                    published = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+                except (OverflowError, OSError, ValueError):
                     published = None
-            cleaned.append({"title": title, "link": link, "publisher": publisher, "published": published})
+            cleaned.append({
+                "title": _first(item, NEWS_TITLE_KEYS, "No title"),
+                "link": _first(item, NEWS_LINK_KEYS, "#"),
+                "publisher": _first(item, NEWS_PUBLISHER_KEYS, "Unknown"),
+                "published": published,
+            })
         return cleaned
     except Exception:
         return []
 
+@njit("float64[:](float64[:], int64)", cache=True)
+def rolling_std_welford(x, w):
+    # O(n) sliding-window sample std: Welford adds for the first w points, then
+    # each step swaps the oldest sample for the newest in the running mean/M2
+    n = x.size
+    out = np.full(n, np.nan)
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        v = x[i]
+        if i < w:
+            delta = v - mean
+            mean += delta / (i + 1)
+            m2 += delta * (v - mean)
+        else:
+            old = x[i - w]
+            prev_mean = mean
+            mean += (v - old) / w
+            m2 += (v - old) * (v - mean + old - prev_mean)
+        if i >= w - 1:
+            out[i] = np.sqrt(m2 / (w - 1)) if m2 > 0.0 else 0.0
+    return out
+
+@st.cache_data(show_spinner=False)
+def _metrics_from_arrays(values):
+    # ndarray arguments are hashed by content, so reruns on an unchanged series skip the work
+    arr = values[~np.isnan(values)]
+    # The sample std needs at least two returns; a short range is otherwise fine, and
+    # the chart drops its volatility panel on its own (see rolling_volatility)
+    if arr.size < 3:
+        return None
+    # Plain NumPy on the float64 prices: no gaps left, so returns are a straight slice
+    returns = arr[1:] / arr[:-1] - 1.0
+    r_mean = returns.mean()
+    r_std = returns.std(ddof=1)
+    vol = r_std * np.sqrt(252)
+    ann_return = r_mean * 252
+    sharpe = (r_mean / r_std) * np.sqrt(252) if r_std != 0 else 0.0
+    max_dd = (arr / np.maximum.accumulate(arr) - 1.0).min()
+    total_return = (arr[-1] / arr[0] - 1) * 100
+    return {"volatility": vol, "avg_return": ann_return, "sharpe_ratio": sharpe, "max_drawdown": max_dd, "total_return": total_return}
+
 def compute_metrics_from_series(series):
-    s = series.dropna()
-    if s.empty:
+    # Scalars only: the rolling volatility is built by the chart, the one place that draws it
+    return _metrics_from_arrays(series.to_numpy(np.float64))
+
+@st.cache_data(show_spinner=False)
+def _rolling_vol_from_arrays(values, index):
+    valid = ~np.isnan(values)
+    arr, index = values[valid], index[valid]
+    returns = arr[1:] / arr[:-1] - 1.0
+    # 30-day std, NaN-padded like rolling(30): one Welford pass with numba, otherwise
+    # a strided window view (no copy)
+    if NUMBA_AVAILABLE:
+        rolling_vol = rolling_std_welford(returns, 30) * np.sqrt(252)
+    else:
+        rolling_vol = np.full(returns.size, np.nan)
+        rolling_vol[29:] = sliding_window_view(returns, 30).std(axis=1, ddof=1) * np.sqrt(252)
+    return rolling_vol, index[1:]
+
+def rolling_volatility(series):
+    """Annualised 30-day rolling volatility of ``series``, or None if it's too short."""
+    if series.count() <= 30:
         return None
-    returns = s.pct_change().dropna()
-    vol = returns.std() * np.sqrt(252)
-    ann_return = returns.mean() * 252
-    sharpe = (returns.mean()/returns.std())*np.sqrt(252) if returns.std() != 0 else 0.0
-    max_dd = ((s / s.cummax()) - 1).min()
-    rolling_vol = returns.rolling(30).std() * np.sqrt(252)
-    total_return = (s.iloc[-1] / s.iloc[0] - 1) * 100
-    return {"volatility": vol, "avg_return": ann_return, "sharpe_ratio": sharpe, "max_drawdown": max_dd, "rolling_volatility": rolling_vol, "total_return": total_return}
+    values, index = _rolling_vol_from_arrays(series.to_numpy(np.float64), series.index.to_numpy())
+    return pd.Series(values, index=index)
+
+ALLOC = {
+    "Conservative": {"Equity": 30, "Bonds": 55, "Cash": 15},
+    "Moderate": {"Equity": 60, "Bonds": 30, "Cash": 10},
+    "Aggressive": {"Equity": 85, "Bonds": 10, "Cash": 5},
+}
 
 def asset_allocation_suggestion(risk):
-    if risk == "Conservative":
-        return {"Equity": 30, "Bonds": 55, "Cash": 15}
-    elif risk == "Moderate":
-        return {"Equity": 60, "Bonds": 30, "Cash": 10}
-    else:
-        return {"Equity": 85, "Bonds": 10, "Cash": 5}
-
-def create_advanced_chart(stock_data, metrics, ticker):
-    if isinstance(stock_data.columns, pd.MultiIndex):
-        if ("Adj Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Adj Close", ticker)]
-        elif ("Close", ticker) in stock_data.columns:
-            price_data = stock_data[("Close", ticker)]
-        else:
-            return None
-        volume_data = stock_data[("Volume", ticker)] if ("Volume", ticker) in stock_data.columns else None
-    else:
-        price_data = stock_data["Adj Close"] if "Adj Close" in stock_data.columns else stock_data["Close"]
-        volume_data = stock_data["Volume"] if "Volume" in stock_data.columns else None
+    return ALLOC.get(risk, ALLOC["Aggressive"])
 
+PriceVolume = namedtuple("PriceVolume", ["price", "volume"])
+
+def extract_price_volume(df, ticker):
+    """Resolve the (Adj) Close and Volume columns of ``df`` once.
+
+    Handles flat and (field, ticker) MultiIndex columns; either series is
+    None when its column is missing.
+    """
+    cols = df.columns
+    is_mi = isinstance(cols, pd.MultiIndex)
+    keys = {field: (field, ticker) if is_mi else field for field in ("Adj Close", "Close", "Volume")}
+    price_key = keys["Adj Close"] if keys["Adj Close"] in cols else keys["Close"]
+    return PriceVolume(
+        df[price_key] if price_key in cols else None,
+        df[keys["Volume"]] if keys["Volume"] in cols else None,
+    )
+
+RESAMPLE_POINTS = 2000
+
+def create_advanced_chart(pv, ticker):
+    if pv.price is None:
+        return None
+    index = pv.price.index
+
+    # Trace values go out as float32: half the bytes of float64 and still ~7 significant
+    # digits on screen (volume too, where int32 could overflow on heavily traded symbols)
     fig = make_subplots(rows=3, cols=1, subplot_titles=(f'{ticker} Price', 'Volume', 'Rolling Volatility'))
-    fig.add_trace(go.Scatter(x=stock_data.index, y=price_data, name='Price'), row=1, col=1)
-    if volume_data is not None:
-        fig.add_trace(go.Bar(x=stock_data.index, y=volume_data, name='Volume'), row=2, col=1)
+    fig.add_trace(go.Scattergl(x=index, y=pv.price.to_numpy(dtype=np.float32), name='Price'), row=1, col=1)
+    if pv.volume is not None:
+        fig.add_trace(go.Bar(x=index, y=pv.volume.to_numpy(dtype=np.float32), name='Volume'), row=2, col=1)
     # plot rolling volatility safely
-    rv = metrics.get('rolling_volatility')
+    rv = rolling_volatility(pv.price)
     if rv is not None:
         try:
-            fig.add_trace(go.Scatter(x=rv.index, y=rv, name='Volatility'), row=3, col=1)
+            fig.add_trace(go.Scattergl(x=rv.index, y=rv.to_numpy(dtype=np.float32), name='Volatility'), row=3, col=1)
         except Exception:
-            # align to stock_data index if possible
+            # align to the price index if possible (one np.interp pass over int64 timestamps)
             try:
-                rv_aligned = rv.reindex(stock_data.index).fillna(method='ffill')
-                fig.add_trace(go.Scatter(x=stock_data.index, y=rv_aligned, name='Volatility'), row=3, col=1)
+                rv_values = rv.to_numpy(dtype=np.float64)
+                valid = ~np.isnan(rv_values)
+                rv_ts = rv.index.view('int64')[valid].astype(np.float64)
+                target_ts = index.view('int64').astype(np.float64)
+                rv_aligned = np.interp(target_ts, rv_ts, rv_values[valid], left=np.nan)
+                fig.add_trace(go.Scattergl(x=index, y=rv_aligned.astype(np.float32), name='Volatility'), row=3, col=1)
             except Exception:
                 pass
     fig.update_layout(height=800, template='plotly_white')
+    # MinMaxLTTB-downsample traces longer than RESAMPLE_POINTS; st.plotly_chart has no Dash
+    # callback to refine on zoom, so this trims the payload of the initial view only.
+    # plotly_resampler pulls in dash/flask, so it's imported only when a series is that long
+    if index.size > RESAMPLE_POINTS:
+        try:
+            from plotly_resampler import FigureResampler
+        except ImportError:
+            return fig
+        fig = FigureResampler(fig, default_n_shown_samples=RESAMPLE_POINTS, resampled_trace_prefix_suffix=("", ""), show_mean_aggregation_size=False)
     return fig
 
+# The allocation and projection panels are fragments with their own inputs: changing
+# one reruns just that panel. A widget outside a fragment reruns the whole script,
+# which refetches and also clears the Run Analysis results. That is why these inputs
+# live in the panels rather than the sidebar: a fragment can't draw into st.sidebar.
+@st.fragment
+def allocation_panel():
+    st.subheader("Asset Allocation Suggestion")
+    risk_level = st.selectbox("Risk Tolerance", ["Conservative","Moderate","Aggressive"], key="risk_level")
+    allocation = asset_allocation_suggestion(risk_level)
+    st.write(allocation)
+    alloc_fig = go.Figure(go.Pie(values=list(allocation.values()), labels=list(allocation.keys()), hole=0.4))
+    alloc_fig.update_layout(title="Suggested Allocation")
+    st.plotly_chart(alloc_fig, use_container_width=True)
+
+@st.fragment
+def projection_panel(currency_sym):
+    st.subheader("Investment Projection")
+    # Two rows of two: the panel only gets half the page width
+    in1, in2 = st.columns(2)
+    in3, in4 = st.columns(2)
+    investment_amount = in1.number_input("Lump-sum Investment", min_value=0, value=50000, step=1000, format="%d", key="investment_amount")
+    monthly_sip = in2.number_input("Monthly SIP", min_value=0, value=10000, step=500, format="%d", key="monthly_sip")
+    investment_years = in3.slider("Investment Period (years)", 1, 40, 15, key="investment_years")
+    expected_return_pct = in4.slider("Expected Annual Return (%)", 0.0, 40.0, 10.0, step=0.1, key="expected_return_pct")
+    months = investment_years * 12
+    monthly_return = (expected_return_pct/100) / 12
+    # Closed-form future value of the lump sum plus end-of-month SIP for every month
+    k = np.arange(months + 1, dtype=np.float64)
+    growth = np.power(1.0 + monthly_return, k)
+    if monthly_return:
+        vals = investment_amount * growth + monthly_sip * (growth - 1.0) / monthly_return
+    else:
+        vals = investment_amount + monthly_sip * k
+    timeline_years = k / 12.0
+    proj_fig = go.Figure()
+    proj_fig.add_trace(go.Scattergl(x=timeline_years.astype(np.float32), y=vals.astype(np.float32), mode='lines', name='Portfolio Value', fill='tozeroy'))
+    proj_fig.update_layout(xaxis_title="Years", yaxis_title=f"Portfolio Value ({currency_sym})", template='plotly_white', height=450)
+    st.plotly_chart(proj_fig, use_container_width=True)
+
 # ---------- Run Analysis ----------
 if run and ticker:
-    hist = fetch_price_history(ticker, start_date, end_date)
+    compare_list = parse_tickers(compare_tickers)
+    # History, live quote and news are independent HTTP calls: start all three at once
+    # and collect each result where it's needed
+    ex = ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()))
+    # Main and comparison tickers come back from a single request, keyed on a sorted tuple
+    f_hist = ex.submit(fetch_price_history_batch, tuple(sorted({ticker, *compare_list})), start_date, end_date)
+    f_live = ex.submit(_get_live_price, ticker)
+    f_news = ex.submit(get_latest_news, ticker, 3)
+    ex.shutdown(wait=False)
+    histories = f_hist.result()
+    hist = histories.get(ticker)
     if hist is None:
         st.error("No historical data found for this ticker. Try adding exchange suffix (e.g., .NS for NSE).")
     else:
-        # Determine price series safely
-        if isinstance(hist.columns, pd.MultiIndex):
-            if ("Adj Close", ticker) in hist.columns:
-                price = hist[("Adj Close", ticker)]
-            elif ("Close", ticker) in hist.columns:
-                price = hist[("Close", ticker)]
-            else:
-                # try single level
-                price = hist["Adj Close"] if "Adj Close" in hist.columns else hist["Close"]
-        else:
-            price = hist["Adj Close"] if "Adj Close" in hist.columns else hist["Close"]
+        # Resolve price/volume columns once; the chart reuses the same series
+        pv = extract_price_volume(hist, ticker)
+        price = pv.price
 
-        metrics = compute_metrics_from_series(price)
+        metrics = compute_metrics_from_series(price) if price is not None else None
         if metrics is None:
             st.error("Unable to compute metrics. Not enough price data.")
         else:
             # Top row: live price + quick metrics as cards
-            # get live price WITHOUT caching (yf.Ticker object is transient)
-            live_price = None
-            try:
-                t_obj_tmp = yf.Ticker(ticker)
-                fast = getattr(t_obj_tmp, "fast_info", None)
-                if fast and getattr(fast, "last_price", None):
-                    live_price = fast.last_price
-                else:
-                    recent = t_obj_tmp.history(period="1d")
-                    if recent is not None and not recent.empty:
-                        live_price = recent['Close'].iloc[-1]
-            except Exception:
-                live_price = None
+            live_price = f_live.result() or float(price.iloc[-1])
 
             c1, c2, c3, c4 = st.columns([1.5,1,1,1])
-            with c1:
-                st.markdown(f"<div class='card'><div class='metric'>{ticker} {currency_sym}{(live_price if live_price is not None else price.iloc[-1]):,.2f}</div>"
-                            f"<div class='small'>Live Price</div></div>", unsafe_allow_html=True)
-            with c2:
-                st.markdown(f"<div class='card'><div class='metric'>{metrics['total_return']:.2f}%</div><div class='small'>Total Return</div></div>", unsafe_allow_html=True)
-            with c3:
-                st.markdown(f"<div class='card'><div class='metric'>{metrics['volatility']*100:.2f}%</div><div class='small'>Annualized Volatility</div></div>", unsafe_allow_html=True)
-            with c4:
-                st.markdown(f"<div class='card'><div class='metric'>{metrics['sharpe_ratio']:.2f}</div><div class='small'>Sharpe Ratio</div></div>", unsafe_allow_html=True)
+            c1.markdown(CARD_TPL.format(value=f"{ticker} {currency_sym}{live_price:,.2f}", label="Live Price"), unsafe_allow_html=True)
+            c2.markdown(CARD_TPL.format(value=f"{metrics['total_return']:.2f}%", label="Total Return"), unsafe_allow_html=True)
+            c3.markdown(CARD_TPL.format(value=f"{metrics['volatility']*100:.2f}%", label="Annualized Volatility"), unsafe_allow_html=True)
+            c4.markdown(CARD_TPL.format(value=f"{metrics['sharpe_ratio']:.2f}", label="Sharpe Ratio"), unsafe_allow_html=True)
 
             st.markdown("---")
 
             # News ticker (horizontal)
-            news_items = get_latest_news(ticker, limit=3)
+            news_items = f_news.result()
             st.markdown("<div class='news-ticker'>", unsafe_allow_html=True)
             if news_items:
                 for it in news_items:
@@ -250,40 +421,16 @@ if run and ticker:
 
             st.markdown("---")
 
-            # Key statistics + allocation
-            left, right = st.columns(2)
-            with left:
-                st.subheader("Key Statistics")
-                st.table(pd.DataFrame({
-                    "Metric": ["Total Return %", "Annualized Return %", "Annualized Volatility %", "Sharpe Ratio", "Max Drawdown %"],
-                    "Value": [f"{metrics['total_return']:.2f}%", f"{metrics['avg_return']*100:.2f}%", f"{metrics['volatility']*100:.2f}%", f"{metrics['sharpe_ratio']:.2f}", f"{metrics['max_drawdown']*100:.2f}%"]
-                }))
-            with right:
-                st.subheader("Asset Allocation Suggestion")
-                allocation = asset_allocation_suggestion(risk_level)
-                st.write(allocation)
-                alloc_fig = px.pie(values=list(allocation.values()), names=list(allocation.keys()), title="Suggested Allocation", hole=0.4)
-                st.plotly_chart(alloc_fig, use_container_width=True)
-
-            # Investment Projection
-            st.subheader("Investment Projection")
-            months = investment_years * 12
-            monthly_return = (expected_return_pct/100) / 12
-            vals = []
-            cur = float(investment_amount)
-            vals.append(cur)
-            for m in range(1, months+1):
-                cur = cur * (1 + monthly_return) + float(monthly_sip)
-                vals.append(cur)
-            timeline_years = [i/12 for i in range(len(vals))]
-            proj_fig = go.Figure()
-            proj_fig.add_trace(go.Scatter(x=timeline_years, y=vals, mode='lines', name='Portfolio Value', fill='tozeroy'))
-            proj_fig.update_layout(xaxis_title="Years", yaxis_title=f"Portfolio Value ({currency_sym})", template='plotly_white', height=450)
-            st.plotly_chart(proj_fig, use_container_width=True)
+            # Key statistics
+            st.subheader("Key Statistics")
+            st.table(pd.DataFrame({
+                "Metric": ["Total Return %", "Annualized Return %", "Annualized Volatility %", "Sharpe Ratio", "Max Drawdown %"],
+                "Value": [f"{metrics['total_return']:.2f}%", f"{metrics['avg_return']*100:.2f}%", f"{metrics['volatility']*100:.2f}%", f"{metrics['sharpe_ratio']:.2f}", f"{metrics['max_drawdown']*100:.2f}%"]
+            }))
 
             # Technical chart
             st.subheader("Detailed Technical Charts")
-            chart = create_advanced_chart(hist, metrics, ticker)
+            chart = create_advanced_chart(pv, ticker)
             if chart:
                 st.plotly_chart(chart, use_container_width=True)
 
@@ -291,17 +438,27 @@ if run and ticker:
             if compare_tickers:
                 st.subheader("Comparison")
                 comps = []
-                for c in [t.strip().upper() for t in compare_tickers.split(",") if t.strip()]:
-                    chist = fetch_price_history(c, start_date, end_date)
+                for c in compare_list:
+                    chist = histories.get(c)
                     if chist is None:
                         continue
-                    cprice = chist["Adj Close"] if "Adj Close" in chist.columns else chist["Close"]
-                    cm = compute_metrics_from_series(cprice)
+                    cprice = extract_price_volume(chist, c).price
+                    cm = compute_metrics_from_series(cprice) if cprice is not None else None
                     if cm:
                         comps.append({"Ticker": c, "Total Return %": f"{cm['total_return']:.2f}", "Sharpe Ratio": f"{cm['sharpe_ratio']:.2f}"})
                 if comps:
                     st.table(pd.DataFrame(comps))
 
+# ---------- Planning ----------
+# Neither panel uses the fetched prices, so both render on every run: the inputs can be
+# set before Run Analysis, and their keyed widget state survives reruns that skip results
+st.markdown("---")
+left, right = st.columns(2)
+with left:
+    allocation_panel()
+with right:
+    projection_panel(currency_sym)
+
 # close main overlay div
 st.markdown('</div>', unsafe_allow_html=True)
 